@@ -1,7 +1,12 @@
 import os
+import calendar
+import math
+import queue
+import threading
+import time
 from dotenv import load_dotenv
-from influxdb_client import InfluxDBClient, Point, WritePrecision
-from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client import InfluxDBClient, WritePrecision
+from influxdb_client.client.write_api import WriteOptions, WriteType
 from datetime import datetime
 
 load_dotenv()
@@ -12,10 +17,57 @@ org = os.getenv("INFLUXDB_ORG")
 url = os.getenv("INFLUXDB_URL")
 bucket = os.getenv("INFLUXDB_BUCKET")
 
+# Queue sentinel telling the writer thread to exit
+_STOP = object()
+
+# Line protocol escaping, matching influxdb_client's Point
+_ESCAPE_MEASUREMENT = str.maketrans({',': r'\,', ' ': r'\ ', '\n': r'\n', '\t': r'\t', '\r': r'\r'})
+_ESCAPE_KEY = str.maketrans({'=': r'\=', ',': r'\,', ' ': r'\ ', '\n': r'\n', '\t': r'\t', '\r': r'\r'})
+
+
+def _format_field(value):
+    """Format a field value for InfluxDB line protocol"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return f'{value}i'
+    if isinstance(value, str):
+        escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{escaped}"'
+    return repr(float(value))
+
+
+def _parse_timestamp_ns(ts):
+    """
+    Convert a PVM 'DD-MM-YYYY HH:MM:SS' timestamp (UTC) to nanoseconds since epoch
+    
+    Args:
+        ts: Timestamp string
+        
+    Returns:
+        int: Nanoseconds since epoch
+    """
+    if (len(ts) != 19 or ts[2] != '-' or ts[5] != '-' or ts[10] != ' '
+            or ts[13] != ':' or ts[16] != ':'
+            or not (ts[0:2] + ts[3:5] + ts[6:10] + ts[11:13] + ts[14:16] + ts[17:19]).isdigit()):
+        raise ValueError(f"timestamp {ts!r} does not match format 'DD-MM-YYYY HH:MM:SS'")
+    # datetime() rejects out-of-range fields that timegm would silently roll over
+    dt = datetime(int(ts[6:10]), int(ts[3:5]), int(ts[0:2]),
+                  int(ts[11:13]), int(ts[14:16]), int(ts[17:19]))
+    return _datetime_to_ns(dt)
+
+
+def _datetime_to_ns(dt):
+    """Convert a datetime to nanoseconds since epoch (naive values are treated as UTC)"""
+    return calendar.timegm(dt.utctimetuple()) * 1_000_000_000 + dt.microsecond * 1000
+
 
 class InfluxDBManager:
     """Manager class for InfluxDB operations"""
     
+    QUEUE_SIZE = 4096
+    QUEUE_BATCH_SIZE = 500
+    
     def __init__(self, url=url, token=token, org=org, bucket=bucket):
         """
         Initialize InfluxDB client
@@ -31,7 +83,61 @@ class InfluxDBManager:
         self.org = org
         self.bucket = bucket
         self.client = InfluxDBClient(url=url, token=token, org=org)
-        self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
+        # Buffer points in memory and flush them in a single HTTP request
+        self.write_api = self.client.write_api(write_options=WriteOptions(
+            write_type=WriteType.batching,
+            batch_size=500,
+            flush_interval=2000,
+            jitter_interval=0,
+            retry_interval=5000
+        ), error_callback=self._on_write_error, retry_callback=self._on_write_retry)
+
+        # Lines are handed to a writer thread so callers never block on the client
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._writer = threading.Thread(target=self._write_loop, name="influxdb-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _on_write_error(conf, data, exception):
+        """Report a batch the write API gave up on (called from the client's thread)"""
+        print(f"InfluxDB write failed, batch dropped: {exception}")
+
+    @staticmethod
+    def _on_write_retry(conf, data, exception):
+        """Report a batch the write API is going to retry (called from the client's thread)"""
+        print(f"InfluxDB write failed, retrying: {exception}")
+
+    def _write_loop(self):
+        """Drain queued lines and hand them to the write API in batches"""
+        while True:
+            line = self._queue.get()
+            if line is _STOP:
+                self._queue.task_done()
+                return
+            batch = [line]
+            stop = False
+            while len(batch) < self.QUEUE_BATCH_SIZE:
+                try:
+                    line = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if line is _STOP:
+                    stop = True
+                    break
+                batch.append(line)
+            
+            try:
+                self.write_api.write(bucket=self.bucket, org=self.org, record=batch,
+                                     write_precision=WritePrecision.NS)
+            except Exception as e:
+                # Only local failures land here; HTTP errors go to _on_write_error
+                print(f"InfluxDB write error: {e}")
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            
+            if stop:
+                return
 
     def insert_into_influxdb(self, measurement, tags, fields, timestamp=None):
         """
@@ -39,37 +145,59 @@ class InfluxDBManager:
         
         Args:
             measurement: Measurement name
-            tags: Dictionary of tags
-            fields: Dictionary of fields
+            tags: Dictionary of tags (device_id is written; omitted when None)
+            fields: Dictionary of fields (gps-data schema; None, NaN and Inf values are omitted)
             timestamp: Timestamp (string, datetime, or None for current time)
             
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if the point was queued for writing, False if the queue was full.
+                Write failures are reported later by the write API callbacks.
         """
         if timestamp and isinstance(timestamp, str):
-            dt = datetime.strptime(timestamp, '%d-%m-%Y %H:%M:%S')
+            ns = _parse_timestamp_ns(timestamp)
         elif isinstance(timestamp, datetime):
-            dt = timestamp
+            ns = _datetime_to_ns(timestamp)
         else:
-            dt = datetime.utcnow()
+            ns = time.time_ns()
 
         try:
-            point = (
-                Point(measurement)
-                .tag("device_id", tags.get("device_id"))
-                .field("priority", fields.get("priority"))
-                .field("latitude", fields.get("latitude"))
-                .field("longitude", fields.get("longitude"))
-                .field("altitude", fields.get("altitude", 0.0))
-                .field("sos_signal", fields.get("sos_signal"))
-                .time(dt, WritePrecision.NS)
+            field_set = ','.join(
+                f'{key}={_format_field(value)}'
+                for key, value in (
+                    ("priority", fields.get("priority")),
+                    ("latitude", fields.get("latitude")),
+                    ("longitude", fields.get("longitude")),
+                    ("altitude", fields.get("altitude", 0.0)),
+                    ("sos_signal", fields.get("sos_signal")),
+                )
+                # Line protocol has no NaN/Inf, so drop them like None (as Point does)
+                if value is not None and (not isinstance(value, float) or math.isfinite(value))
             )
-            self.write_api.write(bucket=self.bucket, org=self.org, record=point)
+            line = measurement.translate(_ESCAPE_MEASUREMENT)
+            device_id = tags.get("device_id")
+            if device_id is not None and device_id != '':
+                line += f',device_id={str(device_id).translate(_ESCAPE_KEY)}'
+            line = f'{line} {field_set} {ns}'
+            self._queue.put_nowait(line)
             return True
+        except queue.Full:
+            print("InfluxDB queue full, dropping point")
+            return False
         except Exception as e:
             raise e
     
+    def flush(self):
+        """
+        Wait until all queued lines have been handed to the write API
+        
+        The batching write API has no working flush (WriteApi.flush is a stub);
+        handed-over points are sent within flush_interval, or by close().
+        """
+        self._queue.join()
+    
     def close(self):
-        """Close InfluxDB client and write API"""
-        self.client.close()
-        self.write_api.close()
\ No newline at end of file
+        """Stop the writer thread, then close write API (drains its buffer) and InfluxDB client"""
+        self._queue.put(_STOP)
+        self._writer.join()
+        self.write_api.close()
+        self.client.close()
\ No newline at end of file
@@ -8,6 +8,48 @@ from SX127x.LoRa import *
 from SX127x.board_config import BOARD
 from InfluxDB import InfluxDBManager
 
+
+def _crc16_table_entry(byte):
+    """Run the bit-serial CRC-16 (poly 0xA001) over a single byte value"""
+    crc = byte
+    for _ in range(8):
+        if crc & 1:
+            crc = (crc >> 1) ^ 0xA001
+        else:
+            crc >>= 1
+    return crc
+
+# Sarwate lookup table for CRC-16/MODBUS, built once at import time
+_CRC16_TABLE = tuple(_crc16_table_entry(b) for b in range(256))
+
+
+def calculate_crc16(data, crc=0xFFFF, _t=_CRC16_TABLE):
+    """
+    Calculate CRC-16 matching the ESP32 implementation
+    
+    Args:
+        data: Bytes to calculate CRC for
+        crc: Starting CRC state, to continue a CRC over a preceding block
+        
+    Returns:
+        uint16_t CRC value
+    """
+    for b in data:
+        crc = (crc >> 8) ^ _t[(crc ^ b) & 0xFF]
+    return crc
+
+# Prefer the compiled slicing-by-4 implementation when it has been built
+try:
+    from _crc import crc16_modbus
+except ImportError:
+    crc16_modbus = calculate_crc16
+
+# Precompiled packet layouts (with and without the trailing CRC)
+_PKT = struct.Struct('<HBB100s20sH')
+_PKT_NOCRC = struct.Struct('<HBB100s20s')
+_PKT_PREFIX = struct.Struct('<HBB100s')
+_PKT_CRC = struct.Struct('<H')
+
 # --- Custom LoRa Class ---
 class LoRaPacket(LoRa):
     """
@@ -28,6 +70,13 @@ class LoRaPacket(LoRa):
     # Packet types
     TYPE_GPS = 0x01
     TYPE_SOS = 0x02
+    TYPE_NAMES = {
+        TYPE_GPS: 'GPS',
+        TYPE_SOS: 'SOS',
+    }
+    
+    # PVM timestamp format (DD-MM-YYYY HH:MM:SS)
+    TIMESTAMP_FORMAT = '%d-%m-%Y %H:%M:%S'
     
     def __init__(self, rx_led=None, sos_led=None, verbose=False, enable_influxdb=True):
         """
@@ -36,12 +85,21 @@ class LoRaPacket(LoRa):
         Args:
             rx_led: LED object for RX indication
             sos_led: LED object for TX indication
-            verbose: Enable verbose output
+            verbose: Enable per-packet console output
         """
         super(LoRaPacket, self).__init__(False)
+        # Kept apart from SX127x's own verbose flag, which logs every mode change
+        self._log_packets = verbose
         self.rx_led = rx_led
         self.sos_led = sos_led
         self.packet_count = 0
+        
+        # LED blink pattern per packet type: (led, on_time, off_time, n)
+        self._blink_map = {
+            self.TYPE_SOS: (sos_led, 0.3, 0.3, 3),
+            self.TYPE_GPS: (rx_led, 0.3, 0.3, 3),
+        }
+        self._blink_default = (rx_led, 0.5, 0.5, 1)
         self.set_mode(MODE.SLEEP)
         self.set_dio_mapping([0, 0, 0, 0, 0, 0])
 
@@ -49,26 +107,8 @@ class LoRaPacket(LoRa):
         self.enable_influxdb = enable_influxdb
         self.influx = InfluxDBManager() if enable_influxdb else None
     
-    @staticmethod
-    def calculate_crc16(data):
-        """
-        Calculate CRC-16 matching the ESP32 implementation
-        
-        Args:
-            data: Bytes to calculate CRC for
-            
-        Returns:
-            uint16_t CRC value
-        """
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 1:
-                    crc = (crc >> 1) ^ 0xA001
-                else:
-                    crc >>= 1
-        return crc
+    # Kept as a class attribute for existing callers
+    calculate_crc16 = staticmethod(calculate_crc16)
     
     def create_packet(self, device_id, packet_type, priority, payload_str="", timestamp_str=""):
         """
@@ -93,61 +133,90 @@ class LoRaPacket(LoRa):
         timestamp_bytes = timestamp_bytes.ljust(self.TIMESTAMP_SIZE, b'\x00')
         
         # Pack the packet (without CRC first)
-        packet_without_crc = struct.pack(
-            '<HBB100s20s',
+        packet_without_crc = _PKT_NOCRC.pack(
             device_id, packet_type, priority, payload_bytes, timestamp_bytes
         )
         
         # Calculate CRC on the packet without CRC
-        crc = self.calculate_crc16(packet_without_crc)
+        crc = crc16_modbus(packet_without_crc)
         
         # Pack complete packet with CRC
-        complete_packet = struct.pack(
-            '<HBB100s20sH',
+        complete_packet = _PKT.pack(
             device_id, packet_type, priority, payload_bytes, timestamp_bytes, crc
         )
         
         return complete_packet
     
+    def build_keepalive_factory(self, device_id, packet_type, priority, payload_str=""):
+        """
+        Build a packet factory for repeated packets where only the timestamp changes
+        
+        The header and padded payload are packed and CRC'd once; each call only
+        encodes the timestamp and folds it into the saved CRC state.
+        
+        Args:
+            device_id: uint16_t device ID
+            packet_type: uint8_t packet type (0x01=GPS, 0x02=SOS)
+            priority: uint8_t priority (0=normal, 1=high)
+            payload_str: string payload (max 100 chars, will be padded/truncated)
+        
+        Returns:
+            callable: takes a timestamp string and returns a 126-byte packet
+        """
+        payload_bytes = payload_str.encode('utf-8')[:self.PAYLOAD_SIZE]
+        payload_bytes = payload_bytes.ljust(self.PAYLOAD_SIZE, b'\x00')
+        prefix = _PKT_PREFIX.pack(device_id, packet_type, priority, payload_bytes)
+        prefix_crc = crc16_modbus(prefix)
+        timestamp_size = self.TIMESTAMP_SIZE
+        
+        def create_keepalive(timestamp_str=""):
+            timestamp_bytes = timestamp_str.encode('utf-8')[:timestamp_size]
+            timestamp_bytes = timestamp_bytes.ljust(timestamp_size, b'\x00')
+            # Continue the CRC from the constant prefix over the timestamp only
+            crc = crc16_modbus(timestamp_bytes, prefix_crc)
+            return prefix + timestamp_bytes + _PKT_CRC.pack(crc)
+        
+        return create_keepalive
+    
     def parse_packet(self, payload):
         """
         Parse custom PVM packet structure
         
         Args:
-            payload: Raw bytes received
+            payload: Raw bytes received (list of ints from read_payload, or bytes)
             
         Returns:
             dict with packet info or None if invalid
         """
         if len(payload) != self.PACKET_SIZE:
-            print(f"Invalid packet size: {len(payload)} (expected {self.PACKET_SIZE})")
+            if self._log_packets:
+                print(f"Invalid packet size: {len(payload)} (expected {self.PACKET_SIZE})")
             return None
         
         try:
+            # read_payload returns a list of ints; convert once and reuse
+            packet = payload if isinstance(payload, (bytes, bytearray)) else bytes(payload)
+            
             # Unpack packet
             device_id, pkt_type, priority, pkt_payload, pkt_timestamp, received_crc = \
-                struct.unpack('<HBB100s20sH', bytes(payload))
+                _PKT.unpack_from(packet, 0)
             
             # Verify CRC (calculate on everything except the last 2 bytes)
-            packet_data_for_crc = bytes(payload[:124])
-            calculated_crc = self.calculate_crc16(packet_data_for_crc)
+            packet_view = memoryview(packet)
+            calculated_crc = crc16_modbus(packet_view[:124])
 
-            if calculated_crc != received_crc:
+            if calculated_crc != received_crc and self._log_packets:
                 print(f"CRC mismatch! Calculated: 0x{calculated_crc:04X}, Received: 0x{received_crc:04X}")
-                print(f"   Packet bytes (first 20): {' '.join(f'{b:02X}' for b in payload[:20])}")
-                print(f"   Packet bytes (last 10):  {' '.join(f'{b:02X}' for b in payload[-10:])}")
+                print(f"   Packet bytes (first 20): {packet_view[:20].hex(' ').upper()}")
+                print(f"   Packet bytes (last 10):  {packet_view[-10:].hex(' ').upper()}")
                 # return None
             
             # Decode payload and timestamp (remove null terminators)
-            pkt_payload_str = pkt_payload.decode('utf-8', 'ignore').rstrip('\x00')
-            pkt_timestamp_str = pkt_timestamp.decode('utf-8', 'ignore').rstrip('\x00')
+            pkt_payload_str = pkt_payload.rstrip(b'\x00').decode('utf-8', 'ignore')
+            pkt_timestamp_str = pkt_timestamp.rstrip(b'\x00').decode('utf-8', 'ignore')
             
             # Get type name
-            type_names = {
-                self.TYPE_GPS: 'GPS',
-                self.TYPE_SOS: 'SOS',
-            }
-            type_name = type_names.get(pkt_type, 'Unknown')
+            type_name = self.TYPE_NAMES.get(pkt_type, 'Unknown')
             
             packet_info = {
                 'device_id': device_id,
@@ -191,6 +260,7 @@ class LoRaPacket(LoRa):
             packet_bytes: bytes to send
         """
         self.set_mode(MODE.STDBY)
+        # SX127x prepends the FIFO register with list concatenation, so it needs a list
         self.write_payload(list(packet_bytes))
         self.set_mode(MODE.TX)
         
@@ -207,8 +277,7 @@ class LoRaPacket(LoRa):
         Returns:
             str: Formatted timestamp
         """
-        current_time = time.localtime()
-        return time.strftime('%d-%m-%Y %H:%M:%S', current_time)
+        return time.strftime(self.TIMESTAMP_FORMAT, time.localtime())
 
     def on_rx_done(self):
         """
@@ -223,7 +292,8 @@ class LoRaPacket(LoRa):
         packet_info = self.parse_packet(payload)
         
         if packet_info:
-            self.print_packet(packet_info, rssi)
+            if self._log_packets:
+                self.print_packet(packet_info, rssi)
             self._indicate_packet_received(packet_info['type'])
 
             # Insert into InfluxDB
@@ -246,12 +316,13 @@ class LoRaPacket(LoRa):
                         fields=fields, 
                         timestamp=packet_info['timestamp']
                     ):
-                        if self.verbose:
-                            print("Saved to InfluxDB")
+                        if self._log_packets:
+                            print("Queued for InfluxDB")
                 except Exception as e:
                     print(f"InfluxDB error: {e}")
         else:
-            print(f"Failed to parse packet ({len(payload)} bytes)")
+            if self._log_packets:
+                print(f"Failed to parse packet ({len(payload)} bytes)")
             if self.rx_led:
                 self.rx_led.blink(on_time=0.05, off_time=0.05, n=3, background=True)
         
@@ -292,15 +363,9 @@ class LoRaPacket(LoRa):
         Args:
             packet_type: Type of packet received
         """
-        if packet_type == self.TYPE_SOS:
-            if self.sos_led:
-                self.sos_led.blink(on_time=0.3, off_time=0.3, n=3, background=True)
-        elif packet_type == self.TYPE_GPS:
-            if self.rx_led:
-                self.rx_led.blink(on_time=0.3, off_time=0.3, n=3, background=True)
-        else:
-            if self.rx_led:
-                self.rx_led.blink(on_time=0.5, off_time=0.5, n=1, background=True)
+        led, on_time, off_time, n = self._blink_map.get(packet_type, self._blink_default)
+        if led:
+            led.blink(on_time=on_time, off_time=off_time, n=n, background=True)
 
     def on_tx_done(self):
         """
@@ -22,17 +22,17 @@ def periodic_send_thread(lora, device_id, interval=30, stop_event=None):
     """
     print(f"Periodic TX enabled (every {interval}s, Device ID: {device_id})")
     
+    create_keepalive = lora.build_keepalive_factory(
+        device_id=device_id,
+        packet_type=1,
+        priority=2,
+        payload_str="DUMMY DATA"
+    )
+    
     packet_count = 0
     while not (stop_event and stop_event.is_set()):
         try:
-            timestamp_str = lora.get_timestamp()
-            packet = lora.create_packet(
-                device_id=device_id,
-                packet_type=1,
-                priority=2,
-                payload_str="DUMMY DATA",
-                timestamp_str=timestamp_str
-            )
+            packet = create_keepalive(lora.get_timestamp())
             
             packet_count += 1
             print(f"TX #{packet_count} at {time.strftime('%H:%M:%S')}")
@@ -67,6 +67,7 @@ if __name__ == "__main__":
     SEND_INTERVAL = 20
     ENABLE_PERIODIC_SEND = False
     VERBOSE = True
+    STATUS_INTERVAL = 60
     
     lora = LoRaPacket(rx_led=rx_led, sos_led=sos_led, verbose=VERBOSE)
     
@@ -103,16 +104,17 @@ if __name__ == "__main__":
         print("="*60)
         
         # Keep running and print periodic status
-        last_check = time.time()
-        start_time = time.time()
+        start_time = last_check = now = time.monotonic()
         while True:
-            time.sleep(0.1)
+            # Sleep until the next status print instead of polling
+            time.sleep(max(1, STATUS_INTERVAL - (now - last_check)))
             
-            if time.time() - last_check > 60:
-                elapsed = int(time.time() - start_time)
+            now = time.monotonic()
+            if now - last_check >= STATUS_INTERVAL:
+                elapsed = int(now - start_time)
                 print(f"[{time.strftime('%H:%M:%S')}] Runtime: {elapsed//60}m {elapsed%60}s | "
                       f"Packets: {lora.packet_count}")
-                last_check = time.time()
+                last_check = now
             
     except KeyboardInterrupt:
         print(f"\nStopped (Total packets: {lora.packet_count})")